@@ -1,5 +1,6 @@
 import os
 import random
+import urllib.parse
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -14,7 +15,8 @@ HTML_FOLDER = os.path.join(DATA_FOLDER, "html")
 NUM_JOBS = 1000  # Number of job listings to scrape
 HTML_FILE_LIMIT = 90  # Max number of HTML files to save
 SCRAPER_THREADS = 3  # Adjust based on system capabilities
-FETCHER_THREADS = 3  # Adjust based on system performance & website limitations
+FETCHER_CONCURRENCY = 10  # Max in-flight listing requests, adjust based on website & API limitations
+FETCHER_RATE_LIMIT = 3  # Average listing requests started per second (token bucket)
 BATCH_SIZE = 25  # Jobs to fetch per request
 MAX_RETRIES = 3  # Retry limit for failed requests
 # Job titles to search for in the webpage to get better and more data.
@@ -40,6 +42,8 @@ JOB_TITLES = [
     "Verkehrsplaner", "Versicherungskaufmann", "Verwaltungsfachangestellter",
     "Weintechnologe", "Werkzeugmechaniker", "Wirtschaftsprüfer", "Zimmermann"
 ]
+# Job titles paired with their URL-encoded search term, encoded once at import time
+ENCODED_JOB_TITLES = tuple((title, urllib.parse.quote_plus(title)) for title in JOB_TITLES)
 
 # === API CONFIGURATION === #
 API_KEY = os.getenv("API_KEY")
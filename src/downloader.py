@@ -18,14 +18,19 @@ class Downloader:
         :param progress_tracker: Instance of ProgressTracker for tracking downloads.
         """
         self.num_html_saved = 0  # Tracks how many HTML files have been saved
-        self.local_html_folder = os.path.join(DATA_FOLDER, "html")
+        self.output_zip = os.path.join(DATA_FOLDER, "job_html_files.zip")
         self.fetcher = Fetcher()  # Use Fetcher for requesting job pages
         self.progress = progress_tracker  # Track downloading progress independently
         self.lock = threading.Lock()
 
         # Ensure storage directory exists
-        if not os.path.exists(self.local_html_folder):
-            os.makedirs(self.local_html_folder)
+        if not os.path.exists(DATA_FOLDER):
+            os.makedirs(DATA_FOLDER)
+
+        # Stream HTML pages straight into the archive instead of writing loose files first.
+        # Opened on the first download, so a failed run never truncates the previous archive
+        self.zip = None
+        self.zip_lock = threading.Lock()
 
     def download_jobs(self, download_queue):
         """
@@ -63,14 +68,14 @@ class Downloader:
                     self.num_html_saved += 1  # Safe counter increment
                     file_index = self.num_html_saved  # Assign file index
 
-                # Save HTML file
-                html_filename = os.path.join(self.local_html_folder, f"job_{file_index}.html")
-                with open(html_filename, "w", encoding="utf-8") as f:
-                    f.write(job_html)
-                    f.flush()
-                    os.fsync(f.fileno())  # Ensure file is written to disk
+                # Save HTML file into the archive
+                with self.zip_lock:
+                    if self.zip is None:
+                        self.zip = zipfile.ZipFile(self.output_zip, "w", compression=zipfile.ZIP_DEFLATED,
+                                                   compresslevel=6)
+                    self.zip.writestr(f"job_{file_index}.html", job_html)
 
-                #logging.info(f"Saved HTML file: {html_filename}")
+                #logging.info(f"Saved HTML file: job_{file_index}.html")
                 self.progress.update_download()
 
                 download_queue.task_done()
@@ -81,31 +86,23 @@ class Downloader:
 
         logging.info(f"Saved {self.num_html_saved}/{HTML_FILE_LIMIT} files.")
         download_queue.join()
-        with self.lock:
-            self.progress.downloading_done = True
+        self.progress.mark_downloading_done()
 
         logging.info("Downloading process finished.")
 
     def zip_html_files(self):
         """
-        Zips all downloaded HTML files into a single archive when limit is reached.
+        Closes the HTML archive once all downloads are finished.
         """
-        if self.num_html_saved < HTML_FILE_LIMIT:
-            logging.info("Not enough HTML files to zip yet.")
-            return
-
-        output_zip = os.path.join(DATA_FOLDER, "job_html_files.zip")
-
         try:
-            with zipfile.ZipFile(output_zip, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
-                for root, _, files in os.walk(self.local_html_folder):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arc_name = os.path.relpath(file_path, start=self.local_html_folder)
-                        zip_file.write(file_path, arcname=arc_name)
-                        logging.info(f"Added {arc_name} to zip")
-
-            logging.info(f"Zipped HTML files to {output_zip}")
+            with self.zip_lock:
+                if self.zip is None:
+                    logging.warning("No HTML files downloaded, archive left unchanged.")
+                    return
+                self.zip.close()
+                self.zip = None
+
+            logging.info(f"Zipped HTML files to {self.output_zip}")
 
         except Exception as err:
             logging.error(f"Error zipping HTML files: {err}")
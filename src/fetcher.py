@@ -1,14 +1,66 @@
 import re
 import time
-import random
+import itertools
 import logging
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
 import threading
 import queue
-import urllib.parse
+import xxhash
+import orjson
 from queue import Queue
-from bs4 import BeautifulSoup
-from config import USER_AGENTS, MAX_RETRIES, API_KEY, NUM_JOBS, FETCHER_THREADS, HTML_FILE_LIMIT, JOB_TITLES
+from selectolax.parser import HTMLParser
+from config import USER_AGENTS, MAX_RETRIES, API_KEY, NUM_JOBS, FETCHER_CONCURRENCY, FETCHER_RATE_LIMIT, SCRAPER_THREADS, HTML_FILE_LIMIT, ENCODED_JOB_TITLES
+
+# Matches the total page count in the "meta" section of a listing page
+_META_RE = re.compile(rb'"meta":\s*\{\s*"numPages":\s*(\d+)')
+
+# Extracts the embedded page state (JSON) of a listing page
+_NEXT_DATA_RE = re.compile(rb'<script id="__NEXT_DATA__" type="application/json"[^>]*>(.+?)</script>', re.DOTALL)
+
+# Pre-built request headers, rotated round-robin over the configured user agents
+_UA_CYCLE = itertools.cycle([{"User-Agent": ua} for ua in USER_AGENTS])
+
+# Shared keep-alive session for synchronous requests (scraper & downloader threads)
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=SCRAPER_THREADS * 4, pool_maxsize=SCRAPER_THREADS * 4,
+                                       max_retries=0))
+
+
+class _RequestLimiter:
+    """
+    Limits listing requests on the event loop: at most `concurrency` requests in flight
+    and on average `rate` requests started per second (token bucket, bursts up to `rate`).
+    Only sleeps when the bucket is empty.
+    """
+
+    def __init__(self, concurrency, rate):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.rate = rate
+        self.tokens = rate
+        self.last_refill = time.monotonic()
+
+    async def __aenter__(self):
+        await self._take_token()
+        await self.semaphore.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+    async def _take_token(self):
+        """Waits until a token is available and consumes it."""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self.tokens) / self.rate)  # Sleep only for the deficit
 
 
 class Fetcher:
@@ -24,8 +76,7 @@ class Fetcher:
         self.job_queue = job_queue
         self.progress = progress_tracker  # Track fetching progress
         self.download_queue = download_queue if download_queue else Queue()  # Ensure it exists
-        self.seen_urls = set()  # Track already fetched job links
-        self.seen_urls_lock = threading.Lock()  # Ensure thread safety
+        self.seen_urls = set()  # Track already fetched job links (64-bit URL hashes)
         self.fetching_complete = threading.Event()  # Flag to indicate fetching completion
         self.page_queue = Queue()  # Pages to process
         self.fetched_count = 0  # Tracks how many jobs have been fetched in total
@@ -44,13 +95,13 @@ class Fetcher:
         Fetch a page using the ScrapingBee API.
         Implements retries on failures.
         """
-        headers = {"User-Agent": random.choice(USER_AGENTS)}
+        headers = next(_UA_CYCLE)
         params = {"api_key": API_KEY, "url": url, "render_js": "true"}
 
         retries = 0
         while retries < MAX_RETRIES:
             try:
-                response = requests.get("https://app.scrapingbee.com/api/v1/", params=params, headers=headers,
+                response = _SESSION.get("https://app.scrapingbee.com/api/v1/", params=params, headers=headers,
                                         timeout=15)
                 response.raise_for_status()
                 return response.text
@@ -68,6 +119,29 @@ class Fetcher:
 
         return None
 
+    @staticmethod
+    async def fetch_page_async(session, limiter, url):
+        """
+        Fetch a page using the ScrapingBee API without blocking a thread.
+        The limiter bounds the number of in-flight requests and the request rate.
+        Returns the raw response body as bytes, leaving decoding to the parser.
+        """
+        headers = next(_UA_CYCLE)
+        params = {"api_key": API_KEY, "url": url, "render_js": "true"}
+
+        async with limiter:
+            try:
+                async with session.get("https://app.scrapingbee.com/api/v1/", params=params, headers=headers,
+                                       timeout=aiohttp.ClientTimeout(total=15)) as response:
+                    response.raise_for_status()
+                    return await response.read()
+            except aiohttp.TooManyRedirects:
+                logging.error(f"Too many redirects for {url}")
+                return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                logging.error(f"Request failed: {err!r} for {url}")
+                return None
+
     @staticmethod
     def extract_job_links(html_content):
         """
@@ -75,131 +149,170 @@ class Fetcher:
         :param html_content: HTML of the job listing page
         :return: A list of job URLs
         """
-        soup = BeautifulSoup(html_content, "html.parser")
-        job_links = soup.select("a[href^='/en/vacancies/detail/']")
-        return ["https://www.jobs.ch" + link["href"] for link in job_links]
+        tree = HTMLParser(html_content)
+        job_links = tree.css("a[href^='/en/vacancies/detail/']")
+        return ["https://www.jobs.ch" + link.attributes["href"] for link in job_links]
 
     def fetch_jobs(self):
         """
-        Start multiple threads for fetching jobs.
+        Fetch job links for all job titles on an asyncio event loop, title by title.
         """
-        threads = []
-
-        for _ in range(FETCHER_THREADS):
-            thread = threading.Thread(target=self._fetch_pages)
-            thread.start()
-            threads.append(thread)
-
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        asyncio.run(self._fetch_pages())
 
         # Check if fetched count is still less than NUM_JOBS
         while self.fetched_count < NUM_JOBS:
             #logging.warning(f"Only {self.fetched_count}/{NUM_JOBS} jobs fetched. Retrying...")
-            self._fetch_pages()  # Fetch more pages if needed
+            asyncio.run(self._fetch_pages())  # Fetch more pages if needed
 
         logging.info("Fetching completed.")
         self.fetching_complete.set()  # Signal scrapers that fetching is done
 
-    def get_total_pages(self, encoded_job_title):
+    async def get_total_pages(self, session, limiter, encoded_job_title):
         """
         Fetch the total number of pages available for a job title.
-        Ensures the correct number is returned to `_fetch_pages()`.
+        Ensures the correct number is returned to `_fetch_title_pages()`.
         """
         url = f"https://www.jobs.ch/en/vacancies/?page=1&term={encoded_job_title}"
-        html = self.fetch_page(url)
+        html = await self.fetch_page_async(session, limiter, url)
 
         if not html:
             logging.error(f"Failed to fetch first page for '{encoded_job_title}'")
             return 0
 
         try:
+            # Prefer the embedded page state, parsed with orjson
+            state = _NEXT_DATA_RE.search(html)
+            if state:
+                try:
+                    total_pages = self._find_num_pages(orjson.loads(state.group(1)))
+                    if total_pages is not None:
+                        return int(total_pages)
+                except orjson.JSONDecodeError:
+                    logging.warning(f"Invalid page state for '{encoded_job_title}', falling back to regex")
+
             # Extract numPages specifically from the "meta" section
-            matches = re.findall(r'"meta":\s*{\s*"numPages":\s*(\d+)', html)
+            match = _META_RE.search(html)
 
-            if matches:
-                total_pages = int(matches[0])  # First match should be the correct one
+            if match:
+                total_pages = int(match.group(1))  # First match should be the correct one
                 #logging.info(f"Found {total_pages} pages for '{encoded_job_title}'")
                 return total_pages
 
-                # If regex fails, try parsing with BeautifulSoup as a fallback
-            soup = BeautifulSoup(html, "html.parser")
-            script_tags = soup.find_all("script")
-
-            for script in script_tags:
-                if script.string and '"meta":' in script.string:
-                    match = re.search(r'"meta":\s*{\s*"numPages":\s*(\d+)', script.string)
-                    if match:
-                        total_pages = int(match.group(1))
-                        logging.info(f"Extracted {total_pages} pages for '{encoded_job_title}' from script tag")
-                        return total_pages
-
-                        # If still not found, log an error and return a safe fallback
             #logging.warning(f"Could not find total page count for '{encoded_job_title}' in HTML.")
-            #logging.debug(f"HTML snippet for '{encoded_job_title}': {html[:1000]}")
             return 1  # Assume at least 1 page exists
 
         except Exception as e:
             logging.error(f"Error extracting pages for '{encoded_job_title}': {e}")
             return 0
 
-    def _fetch_pages(self):
+    @staticmethod
+    def _find_num_pages(node):
         """
-        Fetch job links for each job title, going through all available pages.
-        Stops when NUM_JOBS is reached.
+        Searches the parsed page state depth-first for the first "meta" object holding "numPages".
+        :param node: Parsed JSON value.
+        :return: The page count or None if not found.
         """
-        for job_title in JOB_TITLES:  # Loop through all job titles sequentially
-            encoded_job_title = urllib.parse.quote_plus(job_title)  # Encode for URL
-
-            # Get the actual number of pages available for this job title
-            total_pages = self.get_total_pages(encoded_job_title)
-
-            if total_pages == 0:
-                logging.warning(f"No jobs found for '{job_title}', skipping...")
-                continue  # Skip this job title if there are no jobs
+        if isinstance(node, dict):
+            meta = node.get("meta")
+            if isinstance(meta, dict) and "numPages" in meta:
+                return meta["numPages"]
+            children = node.values()
+        elif isinstance(node, list):
+            children = node
+        else:
+            return None
+
+        for child in children:
+            num_pages = Fetcher._find_num_pages(child)
+            if num_pages is not None:
+                return num_pages
+        return None
 
-            logging.info(f"Fetching {total_pages} pages for '{job_title}'")
+    async def _fetch_pages(self):
+        """
+        Fetch job links for all job titles over one shared HTTP session.
+        Titles are fetched one after another, so the first titles are fetched first.
+        """
+        limiter = _RequestLimiter(FETCHER_CONCURRENCY, FETCHER_RATE_LIMIT)
 
-            for current_page in range(1, total_pages + 1):
+        async with aiohttp.ClientSession() as session:
+            for job_title, encoded_job_title in ENCODED_JOB_TITLES:
                 with self.count_lock:
                     if self.fetched_count >= NUM_JOBS:
-                        return  # Stop fetching if we reached the limit
+                        return  # Stop before paying for another page count lookup
 
-                url = f"https://www.jobs.ch/en/vacancies/?page={current_page}&term={encoded_job_title}"
-                #logging.debug(f"Fetching page {current_page} for '{job_title}': {url}")
+                await self._fetch_title_pages(session, limiter, job_title, encoded_job_title)
 
-                html_content = self.fetch_page(url)
+    async def _fetch_title_pages(self, session, limiter, job_title, encoded_job_title):
+        """
+        Fetch job links for one job title, going through all available pages.
+        Pages are fetched concurrently in windows sized to the jobs still needed.
+        Stops when NUM_JOBS is reached.
+        """
+        # Get the actual number of pages available for this job title
+        total_pages = await self.get_total_pages(session, limiter, encoded_job_title)
 
-                if html_content:
-                    job_links = self.extract_job_links(html_content)
-                    logging.debug(f"Extracted {len(job_links)} job links from page {current_page} for '{job_title}'")
+        if total_pages == 0:
+            logging.warning(f"No jobs found for '{job_title}', skipping...")
+            return  # Skip this job title if there are no jobs
 
-                    if not job_links:
-                        logging.warning(
-                            f"No jobs found on page {current_page} for '{job_title}'. Moving to next keyword.")
-                        break  # Stop searching this job title and go to the next
+        logging.debug("Fetching %d pages for '%s'", total_pages, job_title)
 
-                    with self.seen_urls_lock:
-                        new_links = [link for link in job_links if link not in self.seen_urls]
+        links_per_page = 20  # Approximate page size, updated from the pages fetched so far
+        links_seen = pages_seen = 0
+        next_page = 1
 
-                    if new_links:
-                        for link in new_links:
-                            with self.count_lock:
-                                if self.fetched_count >= NUM_JOBS:
-                                    return  # Stop adding jobs if we hit the limit
+        while next_page <= total_pages:
+            with self.count_lock:
+                remaining = NUM_JOBS - self.fetched_count
+            if remaining <= 0:
+                return  # Stop fetching if we reached the limit
 
-                            self.job_queue.put(link)  # Add to job queue
-                            if self.fetched_count < HTML_FILE_LIMIT:
-                                self.download_queue.put(link)  # Add to download queue
-                            self.fetched_count += 1
-                            self.progress.update_fetch()
+            # Only fetch as many pages at once as are likely needed for the remaining jobs
+            window = min(FETCHER_CONCURRENCY, -(-remaining // links_per_page), total_pages - next_page + 1)
+            pages = range(next_page, next_page + window)
+            next_page += window
 
-                        with self.seen_urls_lock:
-                            self.seen_urls.update(new_links)  # Prevent duplicate fetching
+            urls = [f"https://www.jobs.ch/en/vacancies/?page={current_page}&term={encoded_job_title}"
+                    for current_page in pages]
+            html_contents = await asyncio.gather(*(self.fetch_page_async(session, limiter, url) for url in urls))
 
-                else:
+            # Results come back in page order, so links are still queued page by page
+            for current_page, html_content in zip(pages, html_contents):
+                if not html_content:
                     logging.error(f"Failed to fetch job listing page {current_page} for '{job_title}'")
-                    break  # Stop searching this job title if the page fails
+                    return  # Stop searching this job title if the page fails
+
+                job_links = self.extract_job_links(html_content)
+                logging.debug("Extracted %d job links from page %d for '%s'", len(job_links), current_page, job_title)
+
+                if not job_links:
+                    logging.warning(
+                        f"No jobs found on page {current_page} for '{job_title}'. Moving to next keyword.")
+                    return  # Stop searching this job title and go to the next
+
+                links_seen += len(job_links)
+                pages_seen += 1
+
+                link_hashes = {link: xxhash.xxh64_intdigest(link.encode()) for link in job_links}
+                # No await between check and update, so this is atomic on the event loop
+                new_links = [link for link, h in link_hashes.items() if h not in self.seen_urls]
+                self.seen_urls.update(link_hashes[link] for link in new_links)  # Prevent duplicate fetching
+
+                if new_links:
+                    # Reserve slots for the whole page in one lock acquisition
+                    with self.count_lock:
+                        first_index = self.fetched_count
+                        taken_links = new_links[:max(NUM_JOBS - first_index, 0)]
+                        self.fetched_count += len(taken_links)
+
+                    for index, link in enumerate(taken_links, start=first_index):
+                        self.job_queue.put(link)  # Add to job queue
+                        if index < HTML_FILE_LIMIT:
+                            self.download_queue.put(link)  # Add to download queue
+                        self.progress.update_fetch()
+
+                    if len(taken_links) < len(new_links):
+                        return  # Stop adding jobs if we hit the limit
 
-                time.sleep(random.uniform(0.5, 1.5))  # Rate limiting delay
\ No newline at end of file
+            links_per_page = max(links_seen // pages_seen, 1)
@@ -1,18 +1,30 @@
 import os
-import time
 import logging
+import logging.handlers
 import queue
 import threading
 from fetcher import Fetcher
 from scraper import Scraper
 from downloader import Downloader
 from data_saver import DataSaver
-from config import NUM_JOBS, HTML_FILE_LIMIT, FETCHER_THREADS, SCRAPER_THREADS, DATA_FOLDER
+from config import NUM_JOBS, HTML_FILE_LIMIT, DATA_FOLDER
 from progress_tracker import ProgressTracker
 
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues log records unformatted, so message formatting also runs on the QueueListener thread.
+    Records stay in-process, so they do not need to be made picklable.
+    """
+
+    def prepare(self, record):
+        return record
+
 def setup_logging():
     """
     Initializes logging to write detailed logs to 'scraper.log' inside 'data/'.
+    Worker threads only enqueue records, a QueueListener thread formats them and does the file I/O.
+
+    :return: The started QueueListener, stop it on exit to flush pending records.
     """
     log_path = os.path.join(DATA_FOLDER, "scraper.log")
     os.makedirs(DATA_FOLDER, exist_ok=True)
@@ -27,27 +39,27 @@ def setup_logging():
     console_handler.setLevel(logging.CRITICAL)
     console_handler.setFormatter(logging.Formatter("%(message)s"))
 
+    log_queue = queue.Queue()
+    log_listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler,
+                                                  respect_handler_level=True)
+
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
     logger.handlers = []
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    log_listener.start()
 
     logging.info("Logging initialized successfully.")
-
-    # Ensure log file is created and flushed before ProgressTracker starts
-    file_handler.flush()
-    os.fsync(file_handler.stream.fileno())
-
-    # Small delay before ProgressTracker starts reading logs
-    time.sleep(1)
+    return log_listener
 
 def main():
     """
     Entry point for the job scraper. Manages the end-to-end workflow.
     """
+    log_listener = None
+    scraper = None
     try:
-        setup_logging()
+        log_listener = setup_logging()
         logging.info("Starting job scraper...")
 
         # Initialize job queue
@@ -60,15 +72,8 @@ def main():
         ### Step 1: Fetch Jobs (Wait for Completion)
         fetcher = Fetcher(job_queue, progress_tracker, download_queue)  # Fetcher is initialized first
 
-        fetcher_threads = []
-        for _ in range(FETCHER_THREADS):
-            thread = threading.Thread(target=fetcher.fetch_jobs, daemon=True)
-            thread.start()
-            fetcher_threads.append(thread)
-
-        # Wait for all fetcher threads to complete
-        for thread in fetcher_threads:
-            thread.join()
+        # Fetching runs concurrently on an event loop, so no extra threads are needed
+        fetcher.fetch_jobs()
         logging.info("Fetching completed.")
 
         ### Only initialize scraper & downloader AFTER fetching is done!
@@ -77,44 +82,31 @@ def main():
         downloader = Downloader(progress_tracker)  # Downloader initialized after fetching
 
         ### Step 2: Scrape Jobs (Wait for Completion)
-        scraper_threads = []
-        batch_size = 50
-        for _ in range(SCRAPER_THREADS):
-            thread = threading.Thread(target=scraper.scrape_jobs, daemon=True)
-            thread.start()
-            scraper_threads.append(thread)
-
-        # Periodically save jobs while scraping
-        while any(thread.is_alive() for thread in scraper_threads):
-            if len(scraper.scraped_jobs) >= batch_size:
-                data_saver.batch_save_jobs(scraper.scraped_jobs)
-                scraper.scraped_jobs.clear()
-
-        # Wait for all scrapers to complete
-        for thread in scraper_threads:
-            thread.join()
+        # Scraped jobs are streamed to the DataSaver, which saves them in batches
+        scraper.scrape_jobs()
         logging.info("Scraping completed.")
 
-        # Ensure final batch save for any remaining jobs
-        if scraper.scraped_jobs:
-            data_saver.batch_save_jobs(scraper.scraped_jobs)
+        # Save the remaining jobs, export CSV/JSON and close the database
+        data_saver.finalize()
 
         ### Step 3: Download HTML Files (Wait for Completion)
-        download_threads = []
-        for _ in range(3):  # Use 3 threads for faster downloads
-            thread = threading.Thread(target=downloader.download_jobs, args=(download_queue,))
-            thread.start()
-            download_threads.append(thread)
-
-        # Wait for all download threads to finish
-        for thread in download_threads:
-            thread.join()
-        progress_tracker.complete()
-        logging.info("Downloading completed.")
-
-        ### Step 4: Zip HTML Files (Once All Jobs are Processed)
-        downloader.zip_html_files()
-        logging.info("Zipping completed.")
+        try:
+            download_threads = []
+            for _ in range(3):  # Use 3 threads for faster downloads
+                thread = threading.Thread(target=downloader.download_jobs, args=(download_queue,))
+                thread.start()
+                download_threads.append(thread)
+
+            # Wait for all download threads to finish
+            for thread in download_threads:
+                thread.join()
+            progress_tracker.complete()
+            logging.info("Downloading completed.")
+
+        finally:
+            ### Step 4: Zip HTML Files (Once All Jobs are Processed)
+            downloader.zip_html_files()  # Always close the archive, so it is never left corrupt
+            logging.info("Zipping completed.")
 
         ### Final Step: Clean Exit
         logging.info("Fetching, Scraping, Downloading & Zipping Completed. Exiting program.")
@@ -123,5 +115,11 @@ def main():
     except Exception as e:
         logging.error(f"Unexpected error in main execution: {e}")
 
+    finally:
+        if scraper:
+            scraper.close()  # Persist the scrape cache for the next run, also after errors
+        if log_listener:
+            log_listener.stop()  # Write out any queued log records
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,7 +2,6 @@ import sys
 import threading
 import logging
 import time
-import re
 
 class ProgressTracker:
     """
@@ -10,143 +9,174 @@ class ProgressTracker:
     Ensures accurate, real-time updates while preventing over-counting.
     """
 
-    def __init__(self, total_jobs, html_file_limit, log_file_path="scraper.log"):
+    def __init__(self, total_jobs, html_file_limit):
         """
         Initializes the progress tracker.
 
         :param total_jobs: Total number of jobs to be processed.
         :param html_file_limit: Maximum number of HTML files to be downloaded.
-        :param log_file_path: Path to the log file for tracking scraped jobs.
         """
         self.total_jobs = total_jobs
         self.html_file_limit = html_file_limit
-        self.log_file_path = log_file_path  # Store log file path
 
-        # Counters for job progress
-        self.fetched = 0
-        self.scraped = 0
-        self.downloaded = 0
+        # Per-thread counters, each thread only writes its own cell, readers sum them
+        self._fetch_local, self._fetch_cells = threading.local(), []
+        self._scrape_local, self._scrape_cells = threading.local(), []
+        self._download_local, self._download_cells = threading.local(), []
 
         # State flags to control progress transitions
         self.fetching_done = False
-        self.scraping_done = False
         self.downloading_done = False
 
-        # Lock for thread-safe updates
+        # Lock for terminal output only, counter updates do not take it
         self.lock = threading.Lock()
 
+        # Signalled when downloading finishes, wakes up `complete()`
+        self.download_condition = threading.Condition()
+
         # Start the live counter when the program starts
-        self.running = True  # Control flag for counter
+        self._done = threading.Event()  # Set by `stop()` to end the counter immediately
         self.start_time = time.time()  # Store the start time
 
         # Start progress display thread
         self.progress_thread = threading.Thread(target=self._live_counter, daemon=True)
         self.progress_thread.start()
 
-        # Start log parser thread for scraping progress
-        self.log_parser_thread = threading.Thread(target=self._parse_log_for_scraped_jobs, daemon=True)
-        self.log_parser_thread.start()
-
         sys.stdout.flush()
 
     def _live_counter(self):
         """
         Runs in a background thread and continuously updates the terminal with a time-based counter.
+        Only redraws when the line changed, and not at all if stdout is not a terminal.
         """
-        while self.running:
+        if not sys.stdout.isatty():
+            return  # Piped/CI output only gets the final line from `complete()`
+
+        last_line = None
+
+        while not self._done.is_set():
             elapsed_time = time.time() - self.start_time  # Calculate elapsed time
             minutes = int(elapsed_time // 60)
             seconds = int(elapsed_time % 60)
 
-            with self.lock:
-                sys.stdout.write(f"\r[Time: {minutes:02d}:{seconds:02d}] "
-                                 f"Fetched: {self.fetched}/{self.total_jobs} | "
-                                 f"Scraped: {self.scraped}/{self.total_jobs} | "
-                                 f"Downloaded: {self.downloaded}/{self.html_file_limit}")
-                sys.stdout.flush()
+            line = (f"\r[Time: {minutes:02d}:{seconds:02d}] "
+                    f"Fetched: {self.fetched}/{self.total_jobs} | "
+                    f"Scraped: {self.scraped}/{self.total_jobs} | "
+                    f"Downloaded: {self.downloaded}/{self.html_file_limit}")
 
-            time.sleep(0.1)  # Updates every 100ms for smooth tracking
+            if line != last_line:  # Skip the write syscall when nothing changed
+                with self.lock:
+                    sys.stdout.write(line)
+                    sys.stdout.flush()
+                last_line = line
 
-    def _parse_log_for_scraped_jobs(self):
+            self._done.wait(0.1)  # Updates every 100ms, returns at once on `stop()`
+
+    @staticmethod
+    def _increment(local, cells):
         """
-        Monitors the log file in real-time to count scraped job entries.
+        Increments the calling thread's cell of a per-thread counter.
+        :param local: threading.local holding the calling thread's cell.
+        :param cells: List of all cells of the counter.
+        :return: The new value of the calling thread's cell.
         """
-        scraped_pattern = re.compile(r"Scraped job data: {'id': (\d+), 'url'")
-
-        try:
-            with open(self.log_file_path, "r") as log_file:
-                log_file.seek(0, 2)  # Move to the end of the file
+        cell = getattr(local, "cell", None)
+        if cell is None:
+            cell = local.cell = [0]
+            cells.append(cell)  # Register once per thread
+        cell[0] += 1
+        return cell[0]
 
-                while self.running:
-                    line = log_file.readline()
-                    if not line:
-                        time.sleep(0.5)  # Wait and retry if no new line appears
-                        continue
-
-                    if scraped_pattern.search(line):
-                        self.update_scrape()
+    def update_fetch(self):
+        """
+        Updates the calling thread's counter for fetched jobs without locking.
+        """
+        self._increment(self._fetch_local, self._fetch_cells)
 
-        except FileNotFoundError:
-            logging.error(f"Log file {self.log_file_path} not found.")
-            return
+        if self.fetched >= self.total_jobs:
+            self.fetching_done = True
 
-    def update_fetch(self):
+    @property
+    def fetched(self):
         """
-        Updates the counter for fetched jobs and refreshes terminal output.
+        Number of fetched jobs, summed over all fetching threads.
         Ensures fetch count does not exceed total_jobs.
         """
-        with self.lock:
-            if self.fetched < self.total_jobs:
-                self.fetched += 1
-
-            # Ensure fetching completion prints ONCE
-            if self.fetched == self.total_jobs and not self.fetching_done:
-                self.fetching_done = True
+        return min(sum(cell[0] for cell in self._fetch_cells), self.total_jobs)
 
     def update_scrape(self):
         """
-        Updates the counter for scraped jobs and refreshes terminal output.
-        Ensures scraped count never exceeds fetched count.
+        Updates the calling thread's counter for scraped jobs.
+        No state is shared between scraper threads, see `scraped`.
         """
-        with self.lock:
-            if not self.fetching_done:
-                return  # Ensure fetching is completed before scraping starts
+        if not self.fetching_done:
+            return  # Ensure fetching is completed before scraping starts
 
-            if self.scraped < self.fetched:  # Prevents over-counting scraping
-                self.scraped += 1
+        self._increment(self._scrape_local, self._scrape_cells)
 
-            if self.scraped == self.total_jobs and not self.scraping_done:
-                self.scraping_done = True
-                sys.stdout.flush()
+    @property
+    def scraped(self):
+        """
+        Number of scraped jobs, summed over all scraper threads.
+        Ensures scraped count never exceeds fetched count.
+        """
+        return min(sum(cell[0] for cell in self._scrape_cells), self.fetched)
+
+    @property
+    def scraping_done(self):
+        """
+        Whether all jobs have been scraped.
+        """
+        return self.scraped >= self.total_jobs
 
     def update_download(self):
         """
-        Updates the counter for downloaded HTML files and refreshes terminal output.
+        Updates the calling thread's counter for downloaded HTML files without locking.
+        """
+        self._increment(self._download_local, self._download_cells)
+
+        if self.downloaded >= self.html_file_limit:
+            with self.download_condition:
+                self.download_condition.notify_all()  # Download limit reached
+
+    @property
+    def downloaded(self):
+        """
+        Number of downloaded HTML files, summed over all downloader threads.
         Ensures downloaded count does not exceed HTML_FILE_LIMIT.
         """
-        with self.lock:
-            if self.downloaded < self.html_file_limit:
-                self.downloaded += 1
-                #logging.info(f"Updated download count: {self.downloaded}/{self.html_file_limit}")
+        return min(sum(cell[0] for cell in self._download_cells), self.html_file_limit)
+
+    def mark_downloading_done(self):
+        """
+        Flags downloading as finished and wakes up `complete()`.
+        """
+        with self.download_condition:
+            self.downloading_done = True
+            self.download_condition.notify_all()
 
     def stop(self):
         """
         Stops the live counter when all tasks are done.
         """
-        self.running = False
+        self._done.set()
         self.progress_thread.join()
 
     def complete(self):
         """
         Displays the final completion message when all steps are done.
         """
-        max_retries = 10  # Prevent infinite loop
-        retries = 0
+        with self.download_condition:
+            finished = self.download_condition.wait_for(
+                lambda: self.downloading_done or self.downloaded >= self.html_file_limit,
+                timeout=10  # Prevent waiting forever
+            )
 
-        while not self.downloading_done and retries < max_retries:
+        if not finished:
             logging.info(f"Still waiting: fetch={self.fetching_done}, "
                          f"scrape={self.scraping_done}, download={self.downloading_done}")
-            time.sleep(1)
+
+        self.stop()  # Stop redrawing before printing the final line
 
         with self.lock:
             sys.stdout.write(f"\r[Time: {int(time.time() - self.start_time):02d}] "
@@ -1,9 +1,13 @@
+import os
 import logging
-import threading
+import itertools
 import queue
-from bs4 import BeautifulSoup
+import shelve
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from selectolax.parser import HTMLParser
 from fetcher import Fetcher
-from config import SCRAPER_THREADS
+from config import SCRAPER_THREADS, DATA_FOLDER
 
 
 class Scraper:
@@ -12,6 +16,11 @@ class Scraper:
     Uses a queue-based system for efficient processing.
     """
 
+    # Fields read from labelled spans, see `scrape_url()`
+    LABEL_FIELDS = [
+        "publication_date", "workload", "contract_type", "salary", "languages", "place_of_work"
+    ]
+
     def __init__(self, job_queue, progress_tracker, data_saver):
         """
         Initialize Scraper with a job queue, progress tracker, and shared data saver.
@@ -22,127 +31,162 @@ class Scraper:
         self.job_queue = job_queue
         self.progress = progress_tracker
         self.data_saver = data_saver  # Use shared instance!
-        self.scraped_jobs = []
-        self.job_id = 1
+        self.fetcher = Fetcher()  # Shared across threads, reuses the pooled HTTP session
+        self.job_ids = itertools.count(1)  # Lock-free job ID source, next() is atomic under the GIL
+
+        self.seen_jobs = {}  # Track already scraped jobs (URL -> marker of the claiming call)
 
-        self.seen_jobs = set()  # Track already scraped jobs
-        self.lock = threading.Lock()  # Ensure thread safety
+        # Parsed job fields persist between runs, so reruns skip fetching and parsing known URLs
+        os.makedirs(DATA_FOLDER, exist_ok=True)
+        self.cache = shelve.open(os.path.join(DATA_FOLDER, "scrape_cache"))
+        self.cache_lock = threading.Lock()  # shelve is not thread-safe
 
     def scrape_job(self, job_url):
         """
         Scrape details from a job listing page.
         :param job_url: URL of the job page.
         """
-        with self.lock:
-            if job_url in self.seen_jobs:
-                logging.warning(f"Skipping duplicate job: {job_url}")
-                return None  # Skip duplicate scraping
-            self.seen_jobs.add(job_url)  # Mark as scraped **inside lock**
+        # dict.setdefault is a single atomic call under the GIL, only the first caller gets its marker back
+        marker = object()
+        if self.seen_jobs.setdefault(job_url, marker) is not marker:
+            logging.warning(f"Skipping duplicate job: {job_url}")
+            return None  # Skip duplicate scraping
+
+        with self.cache_lock:
+            job_fields = self.cache.get(job_url)
+
+        if job_fields is None:
+            job_fields = self.scrape_url(job_url)
+            if job_fields is None:
+                return None  # Skip failed jobs, they are retried on the next run
+
+            # Pages without any label are likely blocked or broken, keep them out of the cache
+            if any(job_fields[field] != "N/A" for field in self.LABEL_FIELDS):
+                with self.cache_lock:
+                    self.cache[job_url] = job_fields
+        else:
+            logging.debug("Using cached job data: %s", job_url)
+
+        # Only the ID is drawn atomically, it is assigned per run and never cached
+        job_details = {"id": next(self.job_ids), "url": job_url, **job_fields}
 
-        job_html = Fetcher().fetch_page(job_url)
+        logging.info("Scraped job data: %s", job_details)
+
+        self.progress.update_scrape()  # Update progress
+        self.data_saver.save_job(job_details)  # Stream to the saver, it batches the writes
+
+        return job_details
+
+    def scrape_url(self, job_url):
+        """
+        Fetch a job page and extract its fields.
+        :param job_url: URL of the job page.
+        :return: Dict of job fields without ID and URL, or None if the page could not be fetched.
+        """
+        job_html = self.fetcher.fetch_page(job_url)
         if not job_html:
             logging.error(f"Failed to fetch job page: {job_url}")
-            return None  # Skip failed jobs
-
-        soup = BeautifulSoup(job_html, "html.parser")
-
-        with self.lock:
-            job_details = {
-                "id": self.job_id,
-                "url": job_url,
-                "title": self.get_text(soup, "title"),
-                "publication_date": self.get_text(soup, "Publication date:") or "N/A",
-                "workload": self.get_text(soup, "Workload:") or "N/A",
-                "contract_type": self.get_text(soup, "Contract type:") or "N/A",
-                "salary": self.get_text(soup, "Salary:") or "N/A",
-                "languages": self.get_text(soup, "Language:") or "N/A",
-                "place_of_work": self.get_text(soup, "Place of work:") or "N/A"
-            }
-            self.job_id += 1  # Increment ID
-
-        logging.info(f"Scraped job data: {job_details}")
+            return None
 
-        self.progress.update_scrape()  # Update progress
-        self.scraped_jobs.append(job_details)
+        tree = HTMLParser(job_html)
+        labels = self.index_labels(tree)  # Single pass over all spans
 
+        return {
+            "title": self.extract_title(tree),
+            "publication_date": self.get_text(labels, "Publication date:") or "N/A",
+            "workload": self.get_text(labels, "Workload:") or "N/A",
+            "contract_type": self.get_text(labels, "Contract type:") or "N/A",
+            "salary": self.get_text(labels, "Salary:") or "N/A",
+            "languages": self.get_text(labels, "Language:") or "N/A",
+            "place_of_work": self.get_text(labels, "Place of work:") or "N/A"
+        }
 
-        return job_details
+    @staticmethod
+    def index_labels(tree):
+        """
+        Indexes all spans of the job page by their text in one traversal.
+        Labels wrapped in an inner tag (e.g. <span><b>Salary:</b></span>) are indexed by their nested text.
+        :param tree: Parsed selectolax tree of the job page.
+        :return: Dict of stripped span text -> first span with that text.
+        """
+        labels = {}
+        for span in tree.css("span"):
+            text = span.text(deep=False).strip()  # Direct text first, most labels are plain text spans
+            if not text:
+                text = span.text(deep=True).strip()  # Fall back to nested text for wrapped labels
+            if text:
+                labels.setdefault(text, span)  # Keep the first match like find()
+        return labels
 
     @staticmethod
-    def get_text(soup, label):
+    def get_text(labels, label):
         """
         Extracts job details based on label text.
-        :param soup: Parsed HTML of the job page.
+        :param labels: Span index of the job page, see `index_labels()`.
         :param label: Label to search for (e.g., 'Workload:').
         :return: Extracted text or 'N/A' if not found.
         """
-        if label == "title":
-            return Scraper.extract_title(soup)  # Use title extraction method
+        tag = labels.get(label)
+        if tag is None:
+            return "N/A"
 
-        tag = soup.find("span", string=lambda text: text and text.strip() == label)
-        return tag.find_next("span").text.strip() if tag and tag.find_next("span") else "N/A"
+        value = tag.next  # The value is the label's next sibling span, skip text and comment nodes
+        while value is not None and value.tag in ("-text", "_comment"):
+            value = value.next
+        return value.text().strip() if value is not None and value.tag == "span" else "N/A"
 
     @staticmethod
-    def extract_title(soup):
+    def extract_title(tree):
         """
         Extracts the job title from the job page.
-        :param soup: Parsed HTML of the job page.
+        Priority: <title> tag, then <h1>, then <div class="job-title">.
+        Each fallback is only searched when the previous one is missing.
+        :param tree: Parsed selectolax tree of the job page.
         :return: Job title or 'N/A' if not found.
         """
-        job_title = "N/A"
-
-        # Try extracting from <title> tag
-        job_title_tag = soup.find("title")
-        if job_title_tag:
-            job_title = job_title_tag.text.split(" - Job Offer")[0].strip()
+        node = tree.css_first("title")  # Usually in <head>, found early in the walk
+        if node is not None:
+            return node.text().split(" - Job Offer")[0].strip()
 
-        # If <title> fails, try <h1> (common for job titles)
-        if job_title == "N/A":
-            h1_tag = soup.find("h1")
-            if h1_tag:
-                job_title = h1_tag.text.strip()
+        node = tree.css_first("h1")
+        if node is not None:
+            return node.text().strip()
 
-        # If still no title, try a class-based lookup
-        if job_title == "N/A":
-            title_div = soup.find("div", class_="job-title")
-            if title_div:
-                job_title = title_div.text.strip()
+        node = tree.css_first("div.job-title")
+        if node is not None:
+            return node.text().strip()
 
-        return job_title
+        return "N/A"
 
-    def worker(self):
+    def scrape_jobs(self):
         """
-        Worker function for each scraping thread.
-        Pulls job URLs from the queue, scrapes them, and saves the results.
+        Scrape all queued job URLs in parallel using a thread pool.
+        Fetching is complete at this point, so the queue is drained up front.
+        :return: Number of jobs scraped.
         """
+        job_urls = []
         while True:
             try:
-                job_url = self.job_queue.get(timeout=10)
-                job_details = self.scrape_job(job_url)
-                if job_details:
-                    with self.lock:  # Ensure thread safety when modifying the shared list
-                        pass
-
-                self.job_queue.task_done()  # Mark task as done
+                job_urls.append(self.job_queue.get_nowait())
             except queue.Empty:
-                logging.info("Scraper worker found empty queue, stopping.")
-                break  # Stop if queue is empty
-
-    def scrape_jobs(self):
+                break
+
+        scraped_count = 0
+        with ThreadPoolExecutor(max_workers=SCRAPER_THREADS) as executor:
+            futures = {executor.submit(self.scrape_job, job_url): job_url for job_url in job_urls}
+            for future in as_completed(futures):
+                try:
+                    if future.result():
+                        scraped_count += 1
+                except Exception as e:
+                    logging.error(f"Error scraping job {futures[future]}: {e}")  # One bad page must not stop the rest
+
+        logging.info(f"Scraping process finished, {scraped_count} jobs scraped.")
+        return scraped_count
+
+    def close(self):
         """
-        Start multiple threads to scrape jobs from the queue in parallel.
+        Write the scrape cache to disk and close it.
         """
-        threads = []
-
-        # Create scraper threads
-        for _ in range(SCRAPER_THREADS):
-            thread = threading.Thread(target=self.worker)
-            thread.start()
-            threads.append(thread)
-
-        # Wait for all threads to finish
-        for thread in threads:
-            thread.join()
-
-        logging.info("Scraping process finished.")
-        return self.scraped_jobs
+        with self.cache_lock:
+            self.cache.close()